@@ -1,6 +1,6 @@
 import os
 import threading
-from groq import Groq
+from pipelines import get_alpha_response, get_beta_response, get_sectioned_response
 
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
@@ -22,63 +22,6 @@ from tkinter.filedialog import asksaveasfilename
 
 
 
-# ==== API CONFIG ====
-API_KEY = ""   # Replace with your Groq API key
-client = Groq(api_key=API_KEY)
-
-
-# LLM Alpha Config
-MODEL_ALPHA = "moonshotai/kimi-k2-instruct"
-
-# LLM Beta Config
-SMART_MODEL = "openai/gpt-oss-120b"      # Stage 1: Elaborate
-DUMB_MODEL = "moonshotai/kimi-k2-instruct"        # Stage 2: Generate HTML
-
-
-# ---------------- LLM Alpha Logic ---------------- #
-def get_alpha_response(prompt):
-    """Send prompt to LLM Alpha (Qwen)."""
-    response = client.chat.completions.create(
-        model=MODEL_ALPHA,
-        messages=[
-            {"role": "system", "content": "You are a professional web designer. Generate complete HTML and CSS."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.7
-    )
-    return response.choices[0].message.content
-
-
-
-# ---------------- LLM Beta Logic ---------------- #
-def call_groq_model(prompt, model):
-    """Call any Groq model with a user/system message."""
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.7
-    )
-    return response.choices[0].message.content
-
-
-def get_beta_response(user_prompt):
-    """Two-stage pipeline for Beta."""
-    elaboration_prompt = (
-        f"User request: {user_prompt}\n\n"
-        "You are a prompt expander. The user will give you a short description of a website idea. Dont include any specific html function. Act as if you dont know html at all"
-        "Rewrite it into a longer, detailed prompt for a website generator. Be creative around 200 characters –You can add information if the info is less for 200 characters"
-        "make sure the code is complete and not incomplete and make sure there id no loading screen and if there is a loading screen then it should be completely working"
-        "Output only the expanded prompt."
-    )
-
-    elaborated_prompt = call_groq_model(elaboration_prompt, SMART_MODEL)
-    final_code = call_groq_model(elaborated_prompt, DUMB_MODEL)
-    return final_code, elaborated_prompt
-
-
 # ---------------- UI Components ---------------- #
 class ColoredBoxLayout(BoxLayout):
     def __init__(self, bg_color="#f8f9fa", **kwargs):
@@ -104,7 +47,8 @@ class GroqApp(App):
                                             bg_color="#f8f9fa")
 
         # Mode selector
-        self.mode_spinner = Spinner(text="LLM Alpha", values=["LLM Alpha (recomended)", "LLM Beta (feeling more ambitious)"],
+        self.mode_spinner = Spinner(text="LLM Alpha", values=["LLM Alpha (recomended)", "LLM Beta (feeling more ambitious)",
+                                                                  "LLM Beta Sections (faster for long pages)"],
                                     size_hint_y=None, height=dp(40),
                                     background_color=get_color_from_hex("#4f46e5"),
                                     color=get_color_from_hex("#ffffff"))
@@ -180,6 +124,9 @@ class GroqApp(App):
            print('This is Alpha mode')
            self.status_label.text = "⏳ Generating with LLM Alpha..."
            threading.Thread(target=self.run_alpha, args=(prompt,), daemon=True).start()
+        elif "Sections" in self.mode:
+               self.status_label.text = "⏳ Generating sections in parallel with LLM Beta..."
+               threading.Thread(target=self.run_sections, args=(prompt,), daemon=True).start()
         else:
                self.status_label.text = "⏳ Generating with LLM Beta..."
                threading.Thread(target=self.run_beta, args=(prompt,), daemon=True).start()
@@ -199,6 +146,14 @@ class GroqApp(App):
         except Exception as e:
             Clock.schedule_once(lambda dt, err=e: self.update_output(f"Error: {err}"))
 
+    def run_sections(self, prompt):
+        try:
+            html_code, plan = get_sectioned_response(prompt)
+            Clock.schedule_once(lambda dt: self.update_output(html_code))
+            print("\n--- Section Plan ---\n", plan)
+        except Exception as e:
+            Clock.schedule_once(lambda dt, err=e: self.update_output(f"Error: {err}"))
+
     def update_output(self, html_code):
         self.output_box.text = html_code
         self.status_label.text = "✅ Website generated successfully."
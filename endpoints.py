@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-endpoint model calls with hedging and circuit breaking.
+Any OpenAI-compatible chat completions URL can be used (Groq, a local server, ...).
+1. The request goes to the first healthy endpoint.
+2. If no output has arrived by the configured percentile of time-to-first-chunk,
+   a hedged duplicate goes to the next healthy endpoint (at most max_hedge_rate
+   of calls). The first endpoint to respond wins and the loser is cancelled.
+3. Endpoints that keep failing (connection errors, timeouts, 429, 5xx) are
+   skipped for a cooldown period.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+POLL_INTERVAL = 0.5   # seconds between checks for caller cancellation
+
+
+class RequestCancelled(Exception):
+    """Raised inside an attempt that lost the race, or when the caller gave up."""
+
+
+class StreamError(Exception):
+    """The endpoint sent an error frame in the middle of a stream."""
+
+
+def is_endpoint_failure(error):
+    """Only errors on the endpoint's side count towards its circuit breaker."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, StreamError)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+class Endpoint:
+    """One OpenAI-compatible endpoint plus its circuit breaker state."""
+    def __init__(self, name, url, api_key="", models=None,
+                 failure_threshold=3, cooldown=30.0, timeout=120.0):
+        self.name = name
+        self.url = url
+        self.api_key = api_key
+        self.models = models or {}  # optional model name mapping, e.g. for a local server
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+        self._trial_running = False
+
+    def is_available(self):
+        """Closed breaker, or an open one whose cooldown has passed (half-open trial)."""
+        with self._lock:
+            if self._failures < self.failure_threshold:
+                return True
+            return time.monotonic() >= self._open_until and not self._trial_running
+
+    def acquire(self):
+        """Reserve the endpoint for one attempt. Returns False if it was tripped meanwhile."""
+        with self._lock:
+            if self._failures < self.failure_threshold:
+                return True
+            if time.monotonic() >= self._open_until and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._failures >= self.failure_threshold:
+                self._open_until = time.monotonic() + self.cooldown
+
+    def release(self):
+        """Attempt was cancelled: neither a success nor a failure."""
+        with self._lock:
+            self._trial_running = False
+
+    def stream_chat(self, model, messages, temperature, cancel_event):
+        """Stream content deltas from this endpoint, stopping early if cancelled."""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        data = {
+            "model": self.models.get(model, model),
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True
+        }
+        if cancel_event.is_set():
+            raise RequestCancelled(self.name)
+        with requests.post(self.url, headers=headers, json=data,
+                           stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if cancel_event.is_set():
+                    raise RequestCancelled(self.name)
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                try:
+                    frame = json.loads(payload)
+                except ValueError:
+                    raise StreamError(f"malformed stream frame {payload[:200]!r}")
+                if frame.get("error"):
+                    raise StreamError(str(frame["error"]))
+                choices = frame.get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+
+class EndpointPool:
+    """Sends chat completions to a list of endpoints with hedging and failover."""
+    def __init__(self, endpoints, hedge_percentile=95, max_hedge_rate=0.1, min_samples=20,
+                 default_hedge_delay=10.0, window=200, max_workers=256):
+        self.endpoints = [e if isinstance(e, Endpoint) else Endpoint(**e) for e in endpoints]
+        if not self.endpoints:
+            raise ValueError("At least one endpoint is required.")
+        self.hedge_percentile = hedge_percentile
+        self.max_hedge_rate = max_hedge_rate  # fraction of calls allowed to send a hedge
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.window = window
+        self._latencies = {}  # (kind, model) -> recent time-to-first-chunk samples (seconds)
+        self._hedge_tokens = 0.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="endpoint")
+
+    def resize(self, max_workers):
+        """Replace the attempt executor, e.g. to match a server's concurrency. Call before use."""
+        old = self._executor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="endpoint")
+        old.shutdown(wait=False)
+
+    def hedge_delay(self, key):
+        """Seconds to wait for a first chunk before hedging: the configured percentile."""
+        with self._lock:
+            samples = sorted(self._latencies.get(key, ()))
+        if len(samples) < self.min_samples:
+            return self.default_hedge_delay
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100))
+        return samples[index]
+
+    def _record_latency(self, key, seconds):
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def _take_hedge_token(self):
+        """Token bucket: every call earns max_hedge_rate tokens, a hedge spends one."""
+        with self._lock:
+            if self._hedge_tokens >= 1.0:
+                self._hedge_tokens -= 1.0
+                return True
+            return False
+
+    def _attempt(self, endpoint, key, model, messages, temperature, events, cancel_event):
+        """Push (cancel_event, kind, value) events for one attempt onto a shared queue."""
+        if cancel_event.is_set():
+            endpoint.release()
+            return
+        start = time.monotonic()
+        events.put((cancel_event, "started", start))
+        first = True
+        try:
+            for delta in endpoint.stream_chat(model, messages, temperature, cancel_event):
+                if first:
+                    self._record_latency(key, time.monotonic() - start)
+                    first = False
+                events.put((cancel_event, "chunk", delta))
+        except RequestCancelled:
+            endpoint.release()
+            # A slow attempt that never answered is still a (lower bound) sample.
+            elapsed = time.monotonic() - start
+            if first and elapsed >= self.hedge_delay(key):
+                self._record_latency(key, elapsed)
+            return
+        except Exception as e:
+            if is_endpoint_failure(e):
+                endpoint.record_failure()
+            else:
+                endpoint.release()
+            events.put((cancel_event, "error", e))
+            return
+        if first:
+            self._record_latency(key, time.monotonic() - start)
+        endpoint.record_success()
+        events.put((cancel_event, "done", None))
+
+    def _candidates(self):
+        """Healthy endpoints in order. If every breaker is open, try them all anyway."""
+        candidates = [e for e in self.endpoints if e.is_available()]
+        if candidates:
+            return candidates, False
+        return list(self.endpoints), True
+
+    def _start_next(self, candidates, force, *args):
+        """Launch an attempt on the next endpoint that accepts one. Returns None if none left."""
+        while candidates:
+            endpoint = candidates.pop(0)
+            if not endpoint.acquire() and not force:
+                continue
+            cancel_event = threading.Event()
+            future = self._executor.submit(self._attempt, endpoint, *args, cancel_event)
+            return endpoint, cancel_event, future
+        return None
+
+    @staticmethod
+    def _cancel(endpoint, cancel_event, future):
+        cancel_event.set()
+        if future.cancel():
+            endpoint.release()  # never started, so its reservation is still held
+
+    def chat(self, model, messages, temperature=0.7, kind="chat", cancel_event=None):
+        """Return the content of the first endpoint to respond (see stream)."""
+        return "".join(self.stream(model, messages, temperature, kind, cancel_event))
+
+    def stream(self, model, messages, temperature=0.7, kind="chat", cancel_event=None):
+        """
+        Yield content chunks from the first endpoint to start responding.
+        kind separates latency samples for different call types on the same model.
+        Hedging uses the time-to-first-chunk percentile, counted from when the
+        attempt actually starts; once a chunk arrives the call is committed to
+        that endpoint. Setting cancel_event stops the call with RequestCancelled.
+        """
+        key = (kind, model)
+        with self._lock:
+            self._hedge_tokens = min(self._hedge_tokens + self.max_hedge_rate, 1.0)
+        candidates, force = self._candidates()
+        events = queue.Queue()
+        running = {}  # attempt cancel_event -> (endpoint, future)
+        started = {}  # attempt cancel_event -> start time
+        errors = []
+        hedged = False
+        winner = None
+
+        def launch():
+            attempt = self._start_next(candidates, force, key, model, messages, temperature, events)
+            if attempt:
+                endpoint, attempt_cancel, future = attempt
+                running[attempt_cancel] = (endpoint, future)
+
+        launch()
+        try:
+            while running:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise RequestCancelled("caller")
+                timeout = POLL_INTERVAL
+                if winner is None and not hedged:
+                    starts = [started[c] for c in running if c in started]
+                    if starts:
+                        remaining = min(starts) + self.hedge_delay(key) - time.monotonic()
+                        if remaining <= 0:
+                            # No first chunk within the latency percentile: hedge, if the budget allows.
+                            hedged = True
+                            if self._take_hedge_token():
+                                launch()
+                            continue
+                        timeout = min(timeout, remaining)
+                try:
+                    attempt_cancel, event, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+                if attempt_cancel not in running:
+                    continue  # a loser that was already cancelled
+                if event == "started":
+                    started[attempt_cancel] = value
+                    continue
+                if winner is None and event != "error":
+                    winner = attempt_cancel
+                    for other in list(running):
+                        if other is not winner:
+                            endpoint, future = running.pop(other)
+                            self._cancel(endpoint, other, future)
+                if attempt_cancel is not winner:
+                    endpoint, _ = running.pop(attempt_cancel)
+                    errors.append(f"{endpoint.name}: {value}")
+                    if not running:
+                        # Fail over straight away instead of waiting for the hedge delay.
+                        launch()
+                    continue
+                if event == "chunk":
+                    yield value
+                elif event == "done":
+                    running.pop(attempt_cancel)
+                    return
+                else:
+                    running.pop(attempt_cancel)
+                    raise value
+        finally:
+            for attempt_cancel, (endpoint, future) in running.items():
+                self._cancel(endpoint, attempt_cancel, future)
+        raise RuntimeError("All endpoints failed: " + "; ".join(errors or ["none available"]))
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM Alpha, LLM Beta and sectioned LLM Beta generation pipelines.
+Kept free of any UI imports so both the Kivy app (LLM_main.py) and the
+headless HTTP service (server.py) can use them.
+"""
+
+import html
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from endpoints import EndpointPool, RequestCancelled
+
+
+# ==== API CONFIG ====
+API_KEY = ""   # Replace with your Groq API key
+
+# OpenAI-compatible endpoints, tried in order. Add more for hedging/failover, e.g.
+# {"name": "local", "url": "http://localhost:8000/v1/chat/completions",
+#  "models": {"moonshotai/kimi-k2-instruct": "kimi-k2"}},
+ENDPOINTS = [
+    {"name": "groq", "url": "https://api.groq.com/openai/v1/chat/completions", "api_key": API_KEY},
+]
+HEDGE_PERCENTILE = 95   # Send a hedged duplicate once a call is slower than this percentile
+client = EndpointPool(ENDPOINTS, hedge_percentile=HEDGE_PERCENTILE)
+
+
+# LLM Alpha Config
+MODEL_ALPHA = "moonshotai/kimi-k2-instruct"
+ALPHA_SYSTEM_PROMPT = "You are a professional web designer. Generate complete HTML and CSS."
+
+# LLM Beta Config
+SMART_MODEL = "openai/gpt-oss-120b"      # Stage 1: Elaborate
+DUMB_MODEL = "moonshotai/kimi-k2-instruct"        # Stage 2: Generate HTML
+
+# Sectioned Beta Config
+DEFAULT_SECTIONS = ["nav", "hero", "features", "pricing", "footer"]
+MAX_SECTION_WORKERS = 8   # Sections generated at the same time
+SECTION_RETRIES = 1       # Extra attempts for a failed section before it is left empty
+
+
+# ---------------- LLM Alpha Logic ---------------- #
+def _alpha_messages(prompt):
+    return [
+        {"role": "system", "content": ALPHA_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def get_alpha_response(prompt, cancel_event=None):
+    """Send prompt to LLM Alpha (Qwen)."""
+    return client.chat(model=MODEL_ALPHA, messages=_alpha_messages(prompt), temperature=0.7,
+                       kind="page", cancel_event=cancel_event)
+
+
+def stream_alpha_response(prompt, cancel_event=None):
+    """Same as get_alpha_response, yielding the HTML in chunks as it arrives."""
+    yield from client.stream(model=MODEL_ALPHA, messages=_alpha_messages(prompt), temperature=0.7,
+                             kind="page", cancel_event=cancel_event)
+
+
+
+# ---------------- LLM Beta Logic ---------------- #
+def _model_messages(prompt):
+    return [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def call_groq_model(prompt, model, kind="chat", cancel_event=None):
+    """Call any Groq model with a user/system message. kind keeps latency stats per call type."""
+    return client.chat(model=model, messages=_model_messages(prompt), temperature=0.7,
+                       kind=kind, cancel_event=cancel_event)
+
+
+def elaborate_prompt(user_prompt, cancel_event=None):
+    """Beta stage 1: expand the user's idea into a detailed prompt."""
+    elaboration_prompt = (
+        f"User request: {user_prompt}\n\n"
+        "You are a prompt expander. The user will give you a short description of a website idea. Dont include any specific html function. Act as if you dont know html at all"
+        "Rewrite it into a longer, detailed prompt for a website generator. Be creative around 200 characters –You can add information if the info is less for 200 characters"
+        "make sure the code is complete and not incomplete and make sure there id no loading screen and if there is a loading screen then it should be completely working"
+        "Output only the expanded prompt."
+    )
+    return call_groq_model(elaboration_prompt, SMART_MODEL, kind="elaboration", cancel_event=cancel_event)
+
+
+def get_beta_response(user_prompt, cancel_event=None):
+    """Two-stage pipeline for Beta."""
+    elaborated_prompt = elaborate_prompt(user_prompt, cancel_event)
+    final_code = call_groq_model(elaborated_prompt, DUMB_MODEL, kind="page", cancel_event=cancel_event)
+    return final_code, elaborated_prompt
+
+
+def stream_beta_response(user_prompt, cancel_event=None):
+    """
+    Two-stage pipeline for Beta, streamed.
+    Yields ("elaboration", text) once, then ("chunk", text) for the HTML.
+    """
+    elaborated_prompt = elaborate_prompt(user_prompt, cancel_event)
+    yield "elaboration", elaborated_prompt
+    for chunk in client.stream(model=DUMB_MODEL, messages=_model_messages(elaborated_prompt),
+                               temperature=0.7, kind="page", cancel_event=cancel_event):
+        yield "chunk", chunk
+
+
+
+# ---------------- Sectioned Beta Logic ---------------- #
+# Stage 1 returns a section plan, stage 2 generates every section at the same
+# time, and the pieces are stitched into one page. A long page then takes about
+# as long as its slowest section instead of the sum of all of them.
+
+def plan_sections(user_prompt, cancel_event=None):
+    """Stage 1: ask SMART_MODEL for a shared style guide and a list of sections."""
+    planning_prompt = (
+        f"User request: {user_prompt}\n\n"
+        "You are planning a website that will be built one section at a time by different developers. "
+        "Reply with JSON only, no commentary, in this shape:\n"
+        '{"title": "...", "style_guide": "...", "base_css": "...", '
+        '"sections": [{"id": "...", "description": "..."}]}\n'
+        "style_guide: colors, fonts, spacing, button and card styles every section must follow. "
+        "base_css: the shared CSS for the whole page (CSS variables on :root, reset, body, typography, buttons). "
+        f"sections: in page order, usually {', '.join(DEFAULT_SECTIONS)}; add or drop sections to fit the request. "
+        "Each description must explain the content and layout of that section in detail."
+    )
+    plan_text = call_groq_model(planning_prompt, SMART_MODEL, kind="plan", cancel_event=cancel_event)
+    return _parse_plan(plan_text, user_prompt), plan_text
+
+
+def _parse_plan(plan_text, user_prompt):
+    """Read the JSON plan, falling back to the default sections if the model went off script."""
+    try:
+        plan = json.loads(plan_text[plan_text.index("{"):plan_text.rindex("}") + 1])
+        sections, seen = [], set()
+        for i, s in enumerate(plan["sections"]):
+            section_id = _section_id(s["id"], i, seen)
+            seen.add(section_id)
+            sections.append({"id": section_id, "description": str(s.get("description", ""))})
+        if not sections:
+            raise ValueError("empty section plan")
+    except (ValueError, KeyError, TypeError):
+        return {
+            "title": user_prompt,
+            "style_guide": plan_text,
+            "base_css": "",
+            "sections": [{"id": sid, "description": f"The {sid} section of: {user_prompt}"}
+                         for sid in DEFAULT_SECTIONS],
+        }
+    return {
+        "title": str(plan.get("title") or user_prompt),
+        "style_guide": str(plan.get("style_guide", "")),
+        "base_css": str(plan.get("base_css", "")),
+        "sections": sections,
+    }
+
+
+def _section_id(raw_id, index, seen):
+    """A valid, unique id for #id selectors: a-z, 0-9 and dashes, starting with a letter."""
+    section_id = re.sub(r"[^a-z0-9-]+", "-", str(raw_id).lower()).strip("-") or f"section-{index}"
+    if not section_id[0].isalpha():
+        section_id = f"section-{section_id}"
+    unique_id, n = section_id, 2
+    while unique_id in seen:
+        unique_id = f"{section_id}-{n}"
+        n += 1
+    return unique_id
+
+
+def generate_section(section, plan, cancel_event=None):
+    """Stage 2 for one section: HTML fragment plus its own <style>/<script>."""
+    section_prompt = (
+        f"You are building one section of the website \"{plan['title']}\".\n"
+        f"Section id: {section['id']}\n"
+        f"Section description: {section['description']}\n\n"
+        f"Style guide (follow exactly):\n{plan['style_guide']}\n\n"
+        f"This CSS is already on the page, reuse its variables and classes and do not repeat it:\n"
+        f"{plan['base_css']}\n\n"
+        f"Output only this section: a single <section id=\"{section['id']}\"> element "
+        "(or <nav>/<header>/<footer> where appropriate), followed by one <style> block whose selectors "
+        f"are all scoped under #{section['id']}, and a <script> block only if the section needs one. "
+        "Do not output <html>, <head> or <body>, and no explanations."
+    )
+    return call_groq_model(section_prompt, DUMB_MODEL, kind="section", cancel_event=cancel_event)
+
+
+def _strip_code_fences(text):
+    return re.sub(r"^```[a-zA-Z]*\s*|\s*```$", "", text.strip())
+
+
+_CSS_STRING = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+
+
+def _split_css_rules(css):
+    """Split a stylesheet into top-level rules (keeps @media blocks whole, skips comments and strings)."""
+    rules, rule, depth, quote, i = [], [], 0, None, 0
+    while i < len(css):
+        ch = css[i]
+        if quote:
+            rule.append(ch)
+            if ch == "\\" and i + 1 < len(css):
+                rule.append(css[i + 1])
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif css.startswith("/*", i):
+            end = css.find("*/", i + 2)
+            i = len(css) if end == -1 else end + 2
+            continue
+        else:
+            rule.append(ch)
+            if ch in "\"'":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth = max(depth - 1, 0)
+                if depth == 0:
+                    rules.append("".join(rule).strip())
+                    rule = []
+            elif ch == ";" and depth == 0:  # @import / @charset
+                rules.append("".join(rule).strip())
+                rule = []
+        i += 1
+    return [r for r in rules if r]
+
+
+def _css_key(rule):
+    """Rule text with insignificant whitespace removed (string contents left alone)."""
+    parts = _CSS_STRING.split(rule)
+    for i in range(0, len(parts), 2):  # even parts are outside strings
+        part = re.sub(r"\s+", " ", parts[i])
+        parts[i] = re.sub(r"\s*([{};,>])\s*", r"\1", part).replace(": ", ":")
+    return "".join(parts).replace(";}", "}")
+
+
+def _dedupe_css(stylesheets):
+    """
+    Merge stylesheets, dropping rules that are repeated (ignoring whitespace).
+    The last copy is kept: it already overrides the earlier ones, so removing
+    them cannot change which declarations win.
+    """
+    rules = [rule for css in stylesheets for rule in _split_css_rules(css)]
+    seen, merged = set(), []
+    for rule in reversed(rules):
+        key = _css_key(rule)
+        if key not in seen:
+            seen.add(key)
+            merged.append(rule)
+    merged.reverse()
+    # @import / @charset must come first to be valid
+    merged.sort(key=lambda rule: not rule.startswith(("@charset", "@import")))
+    return "\n".join(merged)
+
+
+def stitch_page(plan, fragments):
+    """Combine section fragments into one HTML document with a single stylesheet."""
+    styles, scripts, bodies = [plan["base_css"]], [], []
+    for fragment in fragments:
+        fragment = _strip_code_fences(fragment)
+        styles += re.findall(r"<style[^>]*>(.*?)</style>", fragment, flags=re.DOTALL | re.IGNORECASE)
+        for script in re.findall(r"<script\b.*?</script>", fragment, flags=re.DOTALL | re.IGNORECASE):
+            if script not in scripts:
+                scripts.append(script)
+        body = re.search(r"<body[^>]*>(.*?)</body>", fragment, flags=re.DOTALL | re.IGNORECASE)
+        if body:
+            fragment = body.group(1)
+        fragment = re.sub(r"<(style|script)\b.*?</\1>|<head\b.*?</head>|<!DOCTYPE[^>]*>|</?(html|body)[^>]*>",
+                          "", fragment, flags=re.DOTALL | re.IGNORECASE)
+        bodies.append(fragment.strip())
+
+    return (
+        "<!DOCTYPE html>\n"
+        "<html lang=\"en\">\n"
+        "<head>\n"
+        "<meta charset=\"UTF-8\">\n"
+        "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">\n"
+        f"<title>{html.escape(plan['title'])}</title>\n"
+        f"<style>\n{_dedupe_css(styles)}\n</style>\n"
+        "</head>\n"
+        "<body>\n"
+        + "\n\n".join(bodies) + "\n"
+        + "".join(script + "\n" for script in scripts)
+        + "</body>\n</html>\n"
+    )
+
+
+def get_sectioned_response(user_prompt, cancel_event=None):
+    """Sectioned Beta pipeline: plan, generate sections in parallel, stitch."""
+    plan, plan_text = plan_sections(user_prompt, cancel_event)
+    workers = min(MAX_SECTION_WORKERS, len(plan["sections"]))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="section") as executor:
+        results = list(executor.map(lambda section: _generate_section_safely(section, plan, cancel_event),
+                                    plan["sections"]))
+    fragments = [fragment for fragment, _ in results]
+    failed = [(section["id"], error) for section, (_, error) in zip(plan["sections"], results) if error]
+    if len(failed) == len(results):
+        raise RuntimeError(f"Every section failed, e.g. {failed[0][0]}: {failed[0][1]}")
+    for section_id, error in failed:
+        print(f"⚠ Section '{section_id}' failed and was left empty: {error}")
+    return stitch_page(plan, fragments), plan_text
+
+
+def _generate_section_safely(section, plan, cancel_event=None):
+    """
+    Generate one section, retrying on failure. Returns (fragment, error);
+    a section that keeps failing becomes an empty placeholder so the sections
+    already paid for are not thrown away.
+    """
+    for attempt in range(SECTION_RETRIES + 1):
+        try:
+            return generate_section(section, plan, cancel_event), None
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            error = e
+    placeholder = f'<section id="{section["id"]}" data-error="{html.escape(str(error))}"></section>'
+    return placeholder, error
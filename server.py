@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless HTTP service for the LLM Alpha / LLM Beta / sectioned LLM Beta pipelines.
+
+    python server.py --port 8000
+
+Endpoints:
+    GET  /health
+    POST /generate/alpha     {"prompt": "...", "stream": true}
+    POST /generate/beta      {"prompt": "...", "stream": true}
+    POST /generate/sections  {"prompt": "...", "stream": true}
+
+With "stream": true (or an "Accept: text/event-stream" header) the HTML is sent
+as Server-Sent Events ("elaboration", "chunk", then "done" or "error"),
+otherwise a single JSON response is returned. Generations run on a bounded
+worker pool; once all workers are busy and the queue is full, new requests get
+a 503 with Retry-After. Every response carries an X-Request-ID header.
+Streams send ": keep-alive" comments while waiting, and a job whose client has
+disconnected is cancelled, including any model calls it is waiting on.
+"""
+
+import argparse
+import json
+import queue
+import re
+import select
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pipelines import (MAX_SECTION_WORKERS, client, get_sectioned_response,
+                       stream_alpha_response, stream_beta_response)
+
+
+MAX_BODY_BYTES = 64 * 1024
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+POLL_INTERVAL = 1.0         # seconds between checks that the client is still connected
+KEEPALIVE_INTERVAL = 15.0   # seconds of silence before an SSE keep-alive comment
+
+
+class PoolFull(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class GenerationPool:
+    """Runs generation jobs on a fixed number of workers with a bounded wait queue."""
+    def __init__(self, workers=200, queue_size=200):
+        self.capacity = workers + queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generate")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self.active = 0
+
+    def submit(self, job):
+        """
+        Start job(cancel_event), a generator of (event, data) pairs, on a worker.
+        Returns (events, cancel_event); events ends with ("end", None).
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PoolFull()
+        with self._lock:
+            self.active += 1
+        events = queue.Queue()
+        cancel_event = threading.Event()
+        self._executor.submit(self._run, job, events, cancel_event)
+        return events, cancel_event
+
+    def _run(self, job, events, cancel_event):
+        try:
+            if cancel_event.is_set():
+                return
+            generator = job(cancel_event)
+            try:
+                for item in generator:
+                    if cancel_event.is_set():
+                        break
+                    events.put(item)
+            finally:
+                generator.close()  # cancels any in-flight model calls
+        except Exception as e:
+            events.put(("error", str(e)))
+        finally:
+            events.put(("end", None))
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+
+
+def alpha_job(prompt, cancel_event):
+    for chunk in stream_alpha_response(prompt, cancel_event):
+        yield "chunk", chunk
+
+
+def beta_job(prompt, cancel_event):
+    yield from stream_beta_response(prompt, cancel_event)
+
+
+def sections_job(prompt, cancel_event):
+    # Sections finish out of order, so the stitched page is sent as one chunk.
+    html_code, plan = get_sectioned_response(prompt, cancel_event)
+    yield "elaboration", plan
+    yield "chunk", html_code
+
+
+PIPELINES = {
+    "/generate/alpha": alpha_job,
+    "/generate/beta": beta_job,
+    "/generate/sections": sections_job,
+}
+
+
+class GenerationHandler(BaseHTTPRequestHandler):
+    server_version = "AIWebsiteBuilder/1.0"
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Request-ID", self.request_id)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_event(self, event, data):
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _read_request_id(self):
+        request_id = self.headers.get("X-Request-ID", "")
+        if REQUEST_ID_PATTERN.fullmatch(request_id):
+            return request_id
+        return uuid.uuid4().hex
+
+    def _client_gone(self):
+        """True once the client has closed its side (socket readable with no data)."""
+        try:
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            return bool(readable) and not self.connection.recv(1, socket.MSG_PEEK)
+        except (OSError, ValueError):
+            return True
+
+    def _next_event(self, events, on_idle=None):
+        """Wait for the next job event, checking for disconnects while the job is silent."""
+        while True:
+            try:
+                return events.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if self._client_gone():
+                    raise ConnectionResetError("client closed the connection")
+                if on_idle:
+                    on_idle()
+
+    def do_GET(self):
+        self.request_id = self._read_request_id()
+        if self.path != "/health":
+            self._send_json(404, {"error": "Not found.", "request_id": self.request_id})
+            return
+        pool = self.server.pool
+        self._send_json(200, {"status": "ok", "active": pool.active, "capacity": pool.capacity})
+
+    def do_POST(self):
+        self.request_id = self._read_request_id()
+        job = PIPELINES.get(self.path)
+        if job is None:
+            self._send_json(404, {"error": "Not found.", "request_id": self.request_id})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": "Invalid Content-Length.", "request_id": self.request_id})
+            return
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {"error": f"Body larger than {MAX_BODY_BYTES} bytes.",
+                                  "request_id": self.request_id})
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            prompt = str(body.get("prompt", "")).strip()
+        except (ValueError, AttributeError):
+            self._send_json(400, {"error": "Body must be a JSON object.", "request_id": self.request_id})
+            return
+        if not prompt:
+            self._send_json(400, {"error": "Please enter a website description.",
+                                  "request_id": self.request_id})
+            return
+        stream = bool(body.get("stream")) or "text/event-stream" in self.headers.get("Accept", "")
+
+        try:
+            events, cancel_event = self.server.pool.submit(lambda cancel: job(prompt, cancel))
+        except PoolFull:
+            self._send_json(503, {"error": "Server busy, try again later.", "request_id": self.request_id},
+                            headers={"Retry-After": "5"})
+            return
+        print(f"[{self.request_id}] {self.path} stream={stream}")
+
+        try:
+            if stream:
+                self._stream_events(events)
+            else:
+                self._collect_events(events)
+        except (BrokenPipeError, ConnectionResetError):
+            print(f"[{self.request_id}] client disconnected")
+        finally:
+            cancel_event.set()
+
+    def _stream_events(self, events):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Request-ID", self.request_id)
+        self.end_headers()
+        last_write = time.monotonic()
+
+        def keep_alive():
+            nonlocal last_write
+            if time.monotonic() - last_write >= KEEPALIVE_INTERVAL:
+                self.wfile.write(b": keep-alive\n\n")
+                self.wfile.flush()
+                last_write = time.monotonic()
+
+        failed = False
+        while True:
+            event, data = self._next_event(events, keep_alive)
+            last_write = time.monotonic()
+            if event == "end":
+                break
+            if event == "error":
+                failed = True
+                self._send_event("error", {"request_id": self.request_id, "error": data})
+            else:
+                self._send_event(event, {"text": data})
+        if not failed:
+            self._send_event("done", {"request_id": self.request_id})
+
+    def _collect_events(self, events):
+        result = {"request_id": self.request_id, "html": ""}
+        chunks = []
+        while True:
+            event, data = self._next_event(events)
+            if event == "end":
+                break
+            if event == "error":
+                self._send_json(502, {"error": f"Error: {data}", "request_id": self.request_id})
+                return
+            if event == "chunk":
+                chunks.append(data)
+            else:
+                result[event] = data
+        result["html"] = "".join(chunks)
+        self._send_json(200, result)
+
+    def log_message(self, format, *args):
+        print(f"[{getattr(self, 'request_id', '-')}] {self.address_string()} {format % args}")
+
+
+class GenerationServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512  # listen backlog, so bursts of clients are not refused
+
+    def __init__(self, address, pool):
+        super().__init__(address, GenerationHandler)
+        self.pool = pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless AI Website Builder service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=200, help="concurrent generations")
+    parser.add_argument("--queue", type=int, default=200, help="requests allowed to wait for a worker")
+    parser.add_argument("--endpoint-workers", type=int, default=None,
+                        help="threads for model calls (default: workers x section fan-out x 2 for hedges)")
+    args = parser.parse_args()
+
+    # Every generation can run up to MAX_SECTION_WORKERS model calls, each with a
+    # possible hedge, so the attempt executor must not be the bottleneck.
+    client.resize(args.endpoint_workers or args.workers * MAX_SECTION_WORKERS * 2)
+
+    server = GenerationServer((args.host, args.port), GenerationPool(args.workers, args.queue))
+    print(f"Serving on http://{args.host}:{args.port} "
+          f"({args.workers} workers, queue of {args.queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()